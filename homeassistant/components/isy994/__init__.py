@@ -1,5 +1,6 @@
 """Support the ISY-994 controllers."""
 from collections import namedtuple
+from itertools import chain
 import logging
 from urllib.parse import urlparse
 
@@ -43,6 +44,14 @@ CONFIG_SCHEMA = vol.Schema({
     })
 }, extra=vol.ALLOW_EXTRA)
 
+
+def _uom_range(*ranges, extras=()) -> frozenset:
+    """Build a set of uom ids from (start, stop) ranges and extra ids."""
+    return frozenset(chain(
+        (str(uom) for start, stop in ranges for uom in range(start, stop)),
+        extras))
+
+
 # Do not use the Hass consts for the states here - we're matching exact API
 # responses, not using them for Hass states
 NODE_FILTERS = {
@@ -55,13 +64,8 @@ NODE_FILTERS = {
     'sensor': {
         # This is just a more-readable way of including MOST uoms between 1-100
         # (Remember that range() is non-inclusive of the stop value)
-        'uom': (['1'] +
-                list(map(str, range(3, 11))) +
-                list(map(str, range(12, 51))) +
-                list(map(str, range(52, 66))) +
-                list(map(str, range(69, 78))) +
-                ['79'] +
-                list(map(str, range(82, 97)))),
+        'uom': _uom_range((3, 11), (12, 51), (52, 66), (69, 78), (82, 97),
+                          extras=('1', '79')),
         'states': [],
         'node_def_id': ['IMETER_SOLO'],
         'insteon_type': ['9.0.', '9.7.']
@@ -110,10 +114,39 @@ NODE_FILTERS = {
     }
 }
 
+# Freeze the filters once at import so the per-node checks below don't have
+# to rebuild them. Prefixes stay ordered for str.startswith().
+for _filters in NODE_FILTERS.values():
+    _filters['uom'] = frozenset(_filters['uom'])
+    _filters['states'] = frozenset(_filters['states'])
+    _filters['node_def_id'] = frozenset(_filters['node_def_id'])
+    _filters['insteon_type'] = tuple(_filters['insteon_type'])
+del _filters
+
 SUPPORTED_DOMAINS = ['binary_sensor', 'sensor', 'lock', 'fan', 'cover',
                      'light', 'switch']
 SUPPORTED_PROGRAM_DOMAINS = ['binary_sensor', 'lock', 'fan', 'cover', 'switch']
 
+# Each node_def_id belongs to exactly one domain, so it can be looked up
+# directly instead of scanning every domain's filter.
+NODE_DEF_TO_DOMAIN = {
+    node_def_id: domain
+    for domain in SUPPORTED_DOMAINS
+    for node_def_id in NODE_FILTERS[domain]['node_def_id']
+}
+
+# Insteon type prefixes in the order the domains are checked, leaving out
+# domains that don't have any
+INSTEON_TYPE_PREFIXES = tuple(
+    (domain, NODE_FILTERS[domain]['insteon_type'])
+    for domain in SUPPORTED_DOMAINS
+    if NODE_FILTERS[domain]['insteon_type']
+)
+
+# Sensors are only treated as binary_sensors if they report one of these
+BINARY_SENSOR_UOMS = frozenset(['2', '78'])
+BINARY_SENSOR_ISY_STATES = frozenset(['on', 'off'])
+
 # ISY Scenes are more like Switches than Hass Scenes
 # (they can turn off, and report their state)
 SCENE_DOMAIN = 'switch'
@@ -125,172 +158,115 @@ ISY994_PROGRAMS = "isy994_programs"
 WeatherNode = namedtuple('WeatherNode', ('status', 'name', 'uom'))
 
 
-def _check_for_node_def(hass: HomeAssistant, node,
-                        single_domain: str = None) -> bool:
-    """Check if the node matches the node_def_id for any domains.
+def _classify_node(buckets: Dict[str, list], node) -> bool:
+    """Sort the node into the first domain whose filters it matches.
 
-    This is only present on the 5.0 ISY firmware, and is the most reliable
-    way to determine a device's type.
+    We have a bunch of different methods for determining the device type,
+    each of which works with different ISY firmware versions or device
+    family. The order here is important, from most reliable to least.
     """
-    if not hasattr(node, 'node_def_id') or node.node_def_id is None:
-        # Node doesn't have a node_def (pre 5.0 firmware most likely)
-        return False
-
-    node_def_id = node.node_def_id
-
-    domains = SUPPORTED_DOMAINS if not single_domain else [single_domain]
-    for domain in domains:
-        if node_def_id in NODE_FILTERS[domain]['node_def_id']:
-            hass.data[ISY994_NODES][domain].append(node)
+    # The node_def_id is only present on the 5.0 ISY firmware, and is the
+    # most reliable way to determine a device's type.
+    node_def_id = getattr(node, 'node_def_id', None)
+    if node_def_id is not None:
+        domain = NODE_DEF_TO_DOMAIN.get(node_def_id)
+        if domain is not None:
+            buckets[domain].append(node)
             return True
 
-    return False
-
-
-def _check_for_insteon_type(hass: HomeAssistant, node,
-                            single_domain: str = None) -> bool:
-    """Check if the node matches the Insteon type for any domains.
-
-    This is for (presumably) every version of the ISY firmware, but only
-    works for Insteon device. "Node Server" (v5+) and Z-Wave and others will
-    not have a type.
-    """
-    if not hasattr(node, 'type') or node.type is None:
-        # Node doesn't have a type (non-Insteon device most likely)
-        return False
-
-    device_type = node.type
-    domains = SUPPORTED_DOMAINS if not single_domain else [single_domain]
-    for domain in domains:
-        if any([device_type.startswith(t) for t in
-                set(NODE_FILTERS[domain]['insteon_type'])]):
-
-            # Hacky special-case just for FanLinc, which has a light module
-            # as one of its nodes. Note that this special-case is not necessary
-            # on ISY 5.x firmware as it uses the superior NodeDefs method
-            if domain == 'fan' and int(node.nid[-1]) == 1:
-                hass.data[ISY994_NODES]['light'].append(node)
+    # The Insteon type is present on (presumably) every version of the ISY
+    # firmware, but only for Insteon devices. "Node Server" (v5+) and Z-Wave
+    # and others will not have a type.
+    device_type = getattr(node, 'type', None)
+    if device_type is not None:
+        for domain, prefixes in INSTEON_TYPE_PREFIXES:
+            if device_type.startswith(prefixes):
+                # Hacky special-case just for FanLinc, which has a light
+                # module as one of its nodes. Note that this special-case is
+                # not necessary on ISY 5.x firmware as it uses the superior
+                # NodeDefs method
+                if domain == 'fan' and int(node.nid[-1]) == 1:
+                    domain = 'light'
+                buckets[domain].append(node)
                 return True
 
-            hass.data[ISY994_NODES][domain].append(node)
-            return True
-
-    return False
-
-
-def _check_for_uom_id(hass: HomeAssistant, node,
-                      single_domain: str = None,
-                      uom_list: list = None) -> bool:
-    """Check if a node's uom matches any of the domains uom filter.
-
-    This is used for versions of the ISY firmware that report uoms as a single
-    ID. We can often infer what type of device it is by that ID.
-    """
-    if not hasattr(node, 'uom') or node.uom is None:
+    node_uom = getattr(node, 'uom', None)
+    if node_uom is None:
         # Node doesn't have a uom (Scenes for example)
         return False
 
-    node_uom = set(map(str.lower, node.uom))
-
-    if uom_list:
-        if node_uom.intersection(uom_list):
-            hass.data[ISY994_NODES][single_domain].append(node)
+    # Some versions of the ISY firmware report uoms as a single ID. We can
+    # often infer what type of device it is by that ID. The IDs are numeric,
+    # so they can be matched without lowercasing.
+    for domain in SUPPORTED_DOMAINS:
+        if not NODE_FILTERS[domain]['uom'].isdisjoint(node_uom):
+            buckets[domain].append(node)
             return True
-    else:
-        domains = SUPPORTED_DOMAINS if not single_domain else [single_domain]
-        for domain in domains:
-            if node_uom.intersection(NODE_FILTERS[domain]['uom']):
-                hass.data[ISY994_NODES][domain].append(node)
-                return True
 
-    return False
-
-
-def _check_for_states_in_uom(hass: HomeAssistant, node,
-                             single_domain: str = None,
-                             states_list: list = None) -> bool:
-    """Check if a list of uoms matches two possible filters.
-
-    This is for versions of the ISY firmware that report uoms as a list of all
-    possible "human readable" states. This filter passes if all of the possible
-    states fit inside the given filter.
-    """
-    if not hasattr(node, 'uom') or node.uom is None:
-        # Node doesn't have a uom (Scenes for example)
-        return False
-
-    node_uom = set(map(str.lower, node.uom))
-
-    if states_list:
-        if node_uom == set(states_list):
-            hass.data[ISY994_NODES][single_domain].append(node)
+    # Other versions report uoms as a list of all possible "human readable"
+    # states. This passes if all of the possible states fit the filter.
+    node_states = frozenset(map(str.lower, node_uom))
+    for domain in SUPPORTED_DOMAINS:
+        if node_states == NODE_FILTERS[domain]['states']:
+            buckets[domain].append(node)
             return True
-    else:
-        domains = SUPPORTED_DOMAINS if not single_domain else [single_domain]
-        for domain in domains:
-            if node_uom == set(NODE_FILTERS[domain]['states']):
-                hass.data[ISY994_NODES][domain].append(node)
-                return True
 
     return False
 
 
-def _is_sensor_a_binary_sensor(hass: HomeAssistant, node) -> bool:
+def _is_sensor_a_binary_sensor(node) -> bool:
     """Determine if the given sensor node should be a binary_sensor."""
-    if _check_for_node_def(hass, node, single_domain='binary_sensor'):
-        return True
-    if _check_for_insteon_type(hass, node, single_domain='binary_sensor'):
+    node_def_id = getattr(node, 'node_def_id', None)
+    if (node_def_id is not None and
+            NODE_DEF_TO_DOMAIN.get(node_def_id) == 'binary_sensor'):
         return True
 
-    # For the next two checks, we're providing our own set of uoms that
-    # represent on/off devices. This is because we can only depend on these
-    # checks in the context of already knowing that this is definitely a
-    # sensor device.
-    if _check_for_uom_id(hass, node, single_domain='binary_sensor',
-                         uom_list=['2', '78']):
-        return True
-    if _check_for_states_in_uom(hass, node, single_domain='binary_sensor',
-                                states_list=['on', 'off']):
+    device_type = getattr(node, 'type', None)
+    if (device_type is not None and device_type.startswith(
+            NODE_FILTERS['binary_sensor']['insteon_type'])):
         return True
 
-    return False
+    node_uom = getattr(node, 'uom', None)
+    if node_uom is None:
+        return False
+
+    # For the uom checks, we're providing our own set of uoms that represent
+    # on/off devices. This is because we can only depend on these checks in
+    # the context of already knowing that this is definitely a sensor device.
+    return (not BINARY_SENSOR_UOMS.isdisjoint(node_uom) or
+            frozenset(map(str.lower, node_uom)) == BINARY_SENSOR_ISY_STATES)
 
 
 def _categorize_nodes(hass: HomeAssistant, nodes, ignore_identifier: str,
                       sensor_identifier: str) -> None:
     """Sort the nodes to their proper domains."""
+    from PyISY.Nodes import Group
+
+    buckets = hass.data[ISY994_NODES]
+    scene_bucket = buckets[SCENE_DOMAIN]
+    sensor_bucket = buckets['sensor']
+    binary_sensor_bucket = buckets['binary_sensor']
     for (path, node) in nodes:
-        ignored = ignore_identifier in path or ignore_identifier in node.name
-        if ignored:
+        name = node.name
+        if ignore_identifier in path or ignore_identifier in name:
             # Don't import this node as a device at all
             continue
 
-        from PyISY.Nodes import Group
         if isinstance(node, Group):
-            hass.data[ISY994_NODES][SCENE_DOMAIN].append(node)
+            scene_bucket.append(node)
             continue
 
-        if sensor_identifier in path or sensor_identifier in node.name:
+        if sensor_identifier in path or sensor_identifier in name:
             # User has specified to treat this as a sensor. First we need to
             # determine if it should be a binary_sensor.
-            if _is_sensor_a_binary_sensor(hass, node):
-                continue
+            if _is_sensor_a_binary_sensor(node):
+                binary_sensor_bucket.append(node)
             else:
-                hass.data[ISY994_NODES]['sensor'].append(node)
-                continue
-
-        # We have a bunch of different methods for determining the device type,
-        # each of which works with different ISY firmware versions or device
-        # family. The order here is important, from most reliable to least.
-        if _check_for_node_def(hass, node):
-            continue
-        if _check_for_insteon_type(hass, node):
-            continue
-        if _check_for_uom_id(hass, node):
-            continue
-        if _check_for_states_in_uom(hass, node):
+                sensor_bucket.append(node)
             continue
 
+        _classify_node(buckets, node)
+
 
 def _categorize_programs(hass: HomeAssistant, programs: dict) -> None:
     """Categorize the ISY994 programs."""
@@ -325,25 +301,21 @@ def _categorize_programs(hass: HomeAssistant, programs: dict) -> None:
 def _categorize_weather(hass: HomeAssistant, climate) -> None:
     """Categorize the ISY994 weather data."""
     climate_attrs = dir(climate)
+    attr_names = set(climate_attrs)
     weather_nodes = [WeatherNode(getattr(climate, attr),
                                  attr.replace('_', ' '),
-                                 getattr(climate, '{}_units'.format(attr)))
+                                 getattr(climate, attr + '_units'))
                      for attr in climate_attrs
-                     if '{}_units'.format(attr) in climate_attrs]
+                     if attr + '_units' in attr_names]
     hass.data[ISY994_WEATHER].extend(weather_nodes)
 
 
 def setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the ISY 994 platform."""
-    hass.data[ISY994_NODES] = {}
-    for domain in SUPPORTED_DOMAINS:
-        hass.data[ISY994_NODES][domain] = []
-
+    hass.data[ISY994_NODES] = {domain: [] for domain in SUPPORTED_DOMAINS}
     hass.data[ISY994_WEATHER] = []
-
-    hass.data[ISY994_PROGRAMS] = {}
-    for domain in SUPPORTED_DOMAINS:
-        hass.data[ISY994_PROGRAMS][domain] = []
+    hass.data[ISY994_PROGRAMS] = {
+        domain: [] for domain in SUPPORTED_PROGRAM_DOMAINS}
 
     isy_config = config.get(DOMAIN)
 
@@ -396,7 +368,6 @@ def setup(hass: HomeAssistant, config: ConfigType) -> bool:
 class ISYDevice(Entity):
     """Representation of an ISY994 device."""
 
-    _attrs = {}
     _name = None  # type: str
 
     def __init__(self, node) -> None:
@@ -404,6 +375,8 @@ class ISYDevice(Entity):
         self._node = node
         self._change_handler = None
         self._control_handler = None
+        self._attrs = {}
+        self._attrs_aux_properties = None
 
     async def async_added_to_hass(self) -> None:
         """Subscribe to the node change events."""
@@ -466,9 +439,15 @@ class ISYDevice(Entity):
 
     @property
     def device_state_attributes(self) -> Dict:
-        """Get the state attributes for the device."""
-        attr = {}
-        if hasattr(self._node, 'aux_properties'):
-            for name, val in self._node.aux_properties.items():
-                attr[name] = '{} {}'.format(val.get('value'), val.get('uom'))
-        return attr
+        """Get the state attributes for the device.
+
+        PyISY replaces the aux_properties dict whenever it refreshes a node,
+        so the formatted attributes are only rebuilt when that dict changes.
+        """
+        aux_properties = getattr(self._node, 'aux_properties', None)
+        if aux_properties is not self._attrs_aux_properties:
+            self._attrs_aux_properties = aux_properties
+            self._attrs = {
+                name: '{} {}'.format(val['value'], val['uom'])
+                for name, val in aux_properties.items()}
+        return self._attrs
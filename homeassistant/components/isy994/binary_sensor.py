@@ -338,7 +338,7 @@ class ISYBinarySensorHeartbeat(ISYDevice, BinarySensorDevice):
     @property
     def device_state_attributes(self):
         """Get the state attributes for the device."""
-        attr = super().device_state_attributes
+        attr = dict(super().device_state_attributes)
         attr['parent_entity_id'] = self._parent_device.entity_id
         return attr
 